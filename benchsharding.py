@@ -0,0 +1,55 @@
+from os import cpu_count, environ
+import os
+import time
+
+from controllers import ShardedRunner
+from controllers.sharding import collect_info
+
+if __name__ == "__main__":
+    # Replays a cassette (AMT_CASSETTE, by default cassettes/collectinfo.json)
+    # for a synthetic fleet, so no hardware or network is involved
+    environ.setdefault(
+        "AMT_CASSETTE",
+        os.path.join(os.path.dirname(__file__), "cassettes", "collectinfo.json"),
+    )
+    if environ.get("AMT_CASSETTE_MODE", "replay") != "replay":
+        raise ValueError("Benchmark only runs in replay mode")
+    hosts = [f"host{i}" for i in range(int(environ.get("AMT_BENCH_HOSTS", "2000")))]
+    threads = int(environ.get("AMT_THREADS", "8"))
+
+    # Comma separated process counts, by default powers of two up to the
+    # number of cores
+    counts = [
+        int(count)
+        for count in environ.get("AMT_BENCH_PROCESSES", "").split(",")
+        if count.strip() != ""
+    ]
+    if len(counts) == 0:
+        processes = 1
+        while processes < (cpu_count() or 1):
+            counts.append(processes)
+            processes *= 2
+        counts.append(cpu_count() or 1)
+
+    print(f"{'processes':>9} {'seconds':>9} {'hosts/s':>9} {'speedup':>8}")
+    baseline: float | None = None
+    for processes in counts:
+        runner = ShardedRunner(
+            hosts, 623, "admin", "", collect_info, processes, threads
+        )
+        start = time.perf_counter()
+        records = 0
+        errors = 0
+        for blob in runner.run():
+            records += blob.count(b"\n")
+            errors += blob.count(b'{"error": ')
+        elapsed = time.perf_counter() - start
+        if records != len(hosts):
+            raise ValueError(f"Got {records} results for {len(hosts)} hosts")
+        if errors > 0:
+            raise ValueError(f"{errors} hosts failed, cassette incomplete?")
+        if baseline is None:
+            baseline = elapsed
+        print(
+            f"{processes:>9} {elapsed:>9.3f} {len(hosts) / elapsed:>9.1f} {baseline / elapsed:>7.2f}x"
+        )
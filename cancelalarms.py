@@ -0,0 +1,24 @@
+from os import environ
+
+from controllers import create_client, AlarmClockController
+
+if __name__ == "__main__":
+    host = environ.get("AMT_HOST")
+    if host is None:
+        raise ValueError("Need AMT host in environ AMT_HOST")
+    port = 623
+    user = "admin"
+    password = environ.get("AMT_PASSWORD")
+    if password is None:
+        raise ValueError("Need AMT password in environ AMT_PASSWORD")
+    client = create_client(host, port, user, password)
+    alarmctl = AlarmClockController(client)
+
+    # Cancel a single alarm by name, or all alarms if none given
+    alarm = environ.get("AMT_ALARM")
+    if alarm is None:
+        for deleted in alarmctl.delete_all_alarms():
+            print(f"==== Cancelled {deleted}")
+    else:
+        alarmctl.delete_alarm(alarm)
+        print(f"==== Cancelled {alarm}")
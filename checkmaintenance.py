@@ -0,0 +1,109 @@
+import os
+import sys
+
+from controllers import (
+    Cassette,
+    KubeClient,
+    MaintenanceWorkflow,
+    ReplayWSManClient,
+    WSManClient,
+)
+from kubestandin import KubeStandIn
+
+# Exercises MaintenanceWorkflow against a local stand-in Kubernetes API server,
+# replaying AMT responses from cassettes/maintenance.json; no hardware needed
+
+
+class StandInClient(ReplayWSManClient):
+    # Powering on a node reboots it in the stand-in
+    def __init__(self, host: str, cassette: Cassette, standin: KubeStandIn):
+        super().__init__(host, 623, "admin", "", cassette)
+        self.standin = standin
+
+    def _run(self, args: tuple[str, ...], input: str | None = None) -> str:
+        output = super()._run(args, input)
+        if input is not None and ":PowerState>2<" in input:
+            self.standin.reboot(self.host)
+        return output
+
+
+def check(description: str, condition: bool):
+    if not condition:
+        print(f"=== FAIL: {description}")
+        sys.exit(1)
+    print(f"=== OK: {description}")
+
+
+def run(standin: KubeStandIn, budget: int, drain_timeout: float = 10) -> dict[str, str]:
+    cassette = Cassette(
+        os.path.join(os.path.dirname(__file__), "cassettes", "maintenance.json")
+    )
+    url = standin.start()
+    try:
+        clients: dict[str, WSManClient] = {
+            name: StandInClient(name, cassette, standin) for name in standin.nodes
+        }
+        workflow = MaintenanceWorkflow(
+            KubeClient(url),
+            clients,
+            budget=budget,
+            drain_timeout=drain_timeout,
+            poll_interval=0.02,
+        )
+        return workflow.run()
+    finally:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    # Rolling reboot within a budget of 2
+    standin = KubeStandIn()
+    for name in ["n0", "n1", "n2", "n3"]:
+        standin.add_node(name)
+        standin.add_pod(name, f"agent-{name}", "kube-system", daemonset=True)
+        standin.add_pod(name, f"web-{name}")
+    standin.blocked["web-n0"] = 2
+    standin.add_node("n4", boot_id="")
+    standin.add_node("n5", unschedulable=True)
+    results = run(standin, budget=2)
+    check("all nodes completed", all(r == "Completed" for r in results.values()))
+    check(
+        "only DaemonSet pods remain",
+        all(
+            pod["metadata"]["name"].startswith("agent-")
+            for pods in standin.pods.values()
+            for pod in pods
+        ),
+    )
+    refused = [event for event in standin.events if event[1] == "refused"]
+    check("refused evictions were retried", len(refused) == 2)
+    check(
+        "budget respected and used",
+        standin.max_concurrent("down", "up") == 2,
+    )
+    check(
+        "node without boot ID completed through Ready transition",
+        results["n4"] == "Completed",
+    )
+    check(
+        "cordon state restored",
+        [standin.nodes[name]["spec"]["unschedulable"] for name in standin.nodes]
+        == [False, False, False, False, False, True],
+    )
+
+    # A node that can't be drained stops the run
+    standin = KubeStandIn()
+    for name in ["n0", "n1", "n2"]:
+        standin.add_node(name)
+    standin.add_pod("n0", "web-n0", blocked=1000)
+    results = run(standin, budget=1, drain_timeout=0.2)
+    check("failing node reported", results["n0"].startswith("Failed"))
+    check(
+        "remaining nodes skipped",
+        results["n1"] == "Skipped" and results["n2"] == "Skipped",
+    )
+    check("failing node left cordoned", standin.nodes["n0"]["spec"]["unschedulable"])
+    check(
+        "no node powered off",
+        not any(event[1] == "down" for event in standin.events),
+    )
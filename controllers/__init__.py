@@ -1,4 +1,15 @@
 from .wsmanclient import WSManClient as WSManClient
 from .bootcontroller import BootController as BootController
 from .powercontroller import PowerController as PowerController
-from .kvmcontroller import KVMController as KVMController
\ No newline at end of file
+from .kvmcontroller import KVMController as KVMController
+from .alarmclockcontroller import AlarmClockController as AlarmClockController
+from .cassette import Cassette as Cassette
+from .cassette import RecordingWSManClient as RecordingWSManClient
+from .cassette import ReplayWSManClient as ReplayWSManClient
+from .factory import create_client as create_client
+from .profiler import Profiler as Profiler
+from .kubeclient import KubeClient as KubeClient
+from .maintenance import MaintenanceWorkflow as MaintenanceWorkflow
+from .telemetry import TelemetryStore as TelemetryStore
+from .telemetry import TelemetryRecorder as TelemetryRecorder
+from .sharding import ShardedRunner as ShardedRunner
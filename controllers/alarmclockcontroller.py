@@ -0,0 +1,193 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, cast
+from urllib.parse import quote
+from lxml import etree
+from .wsmanclient import WSManClient
+
+# ElementMaker is not typed yet, workaround from
+#   https://github.com/python/mypy/issues/6948#issuecomment-654371424
+from lxml.builder import ElementMaker as ElementMaker_untyped
+
+ElementMaker = cast(Any, ElementMaker_untyped)
+
+
+class AlarmClockController:
+    # Namespace for the cim:Datetime / cim:Interval wrapper elements
+    COMMON = "http://schemas.dmtf.org/wbem/wscim/1/common"
+
+    ADDALARMRESULTS = {
+        # https://software.intel.com/sites/manageability/AMT_Implementation_and_Reference_Guide/default.htm?turl=HTMLDocuments%2FWS-Management_Class_Reference%2FAMT_AlarmClockService.htm%23AddAlarm
+        "0": "Completed with No Error",
+        "1": "Internal Error",
+        "23": "Max Limit Reached",
+        "36": "Invalid Parameter",
+        "38": "Flash Write Limit Exceeded",
+    }
+
+    def __init__(self, client: WSManClient):
+        self.client = client
+
+    @staticmethod
+    def staggered_start_times(
+        start: datetime, count: int, spread: timedelta
+    ) -> list[datetime]:
+        # Spread count power-on times evenly, starting at start, with spread
+        # between each subsequent one
+        if count < 0:
+            raise ValueError("Count must not be negative")
+        if spread < timedelta(0):
+            raise ValueError("Spread must not be negative")
+        return [start + spread * i for i in range(count)]
+
+    def _format_datetime(self, when: datetime) -> str:
+        # AMT only accepts UTC timestamps, without fractional seconds
+        if when.tzinfo is None:
+            raise ValueError("Alarm time must be timezone aware")
+        return when.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def _format_interval(self, interval: timedelta) -> str:
+        # xs:duration; AMT supports a resolution of minutes
+        if interval < timedelta(minutes=1):
+            raise ValueError("Alarm interval must be at least one minute")
+        minutes = int(interval.total_seconds()) // 60
+        days, minutes = divmod(minutes, 24 * 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"P{days}DT{hours}H{minutes}M"
+
+    def _check_fault(self, tree: Any):
+        fault = tree.find(f".//{{{WSManClient.SOAPENV}}}Fault")
+        if fault is not None:
+            text = tree.find(
+                f".//{{{WSManClient.SOAPENV}}}Reason//{{{WSManClient.SOAPENV}}}Text"
+            )
+            if text is None or text.text is None:
+                raise ValueError("Unknown error")
+            raise ValueError(text.text)
+
+    def get_alarms(self) -> list[dict[str, str]]:
+        xmlns = f"{WSManClient.IPS}/IPS_AlarmClockOccurrence"
+        # Optimized enumeration returns all items in a single response; AMT
+        # only supports a handful of alarms anyway
+        raw_xml = self.client.retrieve("enumerate", xmlns, "-o", "-m", "32")
+        tree = self.client.parse(raw_xml)
+        self._check_fault(tree)
+
+        alarms: list[dict[str, str]] = []
+        for occurrence in tree.findall(f".//{{{xmlns}}}IPS_AlarmClockOccurrence"):
+            alarm: dict[str, str] = {}
+            for field in ["InstanceID", "ElementName", "DeleteOnCompletion"]:
+                element = occurrence.find(f"{{{xmlns}}}{field}")
+                if element is None or element.text is None:
+                    continue
+                alarm[field] = element.text
+            if "InstanceID" not in alarm:
+                raise ValueError("Missing InstanceID")
+            start_time = occurrence.find(f"{{{xmlns}}}StartTime/{{*}}Datetime")
+            if start_time is None or start_time.text is None:
+                raise ValueError(f"Missing StartTime for alarm {alarm['InstanceID']}")
+            alarm["StartTime"] = start_time.text
+            interval = occurrence.find(f"{{{xmlns}}}Interval/{{*}}Interval")
+            if interval is not None and interval.text is not None:
+                alarm["Interval"] = interval.text
+            alarms.append(alarm)
+        return alarms
+
+    def add_alarm(
+        self,
+        name: str,
+        start: datetime,
+        interval: timedelta | None = None,
+        delete_on_completion: bool = True,
+    ) -> str:
+        selector = "Name=Intel(r)%20AMT%20Alarm%20Clock%20Service"
+        xmlns = f"{WSManClient.AMT}/AMT_AlarmClockService"
+        occurrence_xmlns = f"{WSManClient.IPS}/IPS_AlarmClockOccurrence"
+        nsmap: Dict[str | None, str] = {
+            "p": xmlns,
+            "s": occurrence_xmlns,
+            "c": self.COMMON,
+        }
+
+        with self.client.phase("build"):
+            P = ElementMaker(namespace=xmlns, nsmap=nsmap)
+            REQUEST = P.AddAlarm_INPUT
+            ALARMTEMPLATE = P.AlarmTemplate
+            S = ElementMaker(namespace=occurrence_xmlns, nsmap=nsmap)
+            INSTANCEID = S.InstanceID
+            ELEMENTNAME = S.ElementName
+            STARTTIME = S.StartTime
+            INTERVAL = S.Interval
+            DELETEONCOMPLETION = S.DeleteOnCompletion
+            C = ElementMaker(namespace=self.COMMON, nsmap=nsmap)
+            DATETIME = C.Datetime
+            CIMINTERVAL = C.Interval
+
+            template: Any = ALARMTEMPLATE(
+                INSTANCEID(name),
+                ELEMENTNAME(name),
+                STARTTIME(DATETIME(self._format_datetime(start))),
+            )
+            if interval is not None:
+                template.append(INTERVAL(CIMINTERVAL(self._format_interval(interval))))
+            template.append(
+                DELETEONCOMPLETION("true" if delete_on_completion else "false")
+            )
+            request: Any = REQUEST(template)
+            input_xml = etree.tostring(request, pretty_print=True).decode("utf-8")
+        raw_xml = self.client.send_input(
+            input_xml,
+            "invoke",
+            "-a",
+            "AddAlarm",
+            f"{xmlns}?{selector}",
+        )
+        tree = self.client.parse(raw_xml)
+        self._check_fault(tree)
+        returnvalue = tree.find(f".//{{{xmlns}}}ReturnValue")
+        if (
+            returnvalue is None
+            or returnvalue.text is None
+            or self.ADDALARMRESULTS.get(returnvalue.text) is None
+        ):
+            raise ValueError("Could not determine add alarm result")
+        return self.ADDALARMRESULTS[returnvalue.text]
+
+    def schedule_power_on(self, start: datetime, name: str | None = None) -> str:
+        # A one-shot alarm wakes the machine from Off/Sleep/Hibernate and is
+        # removed by the firmware once it fired
+        if name is None:
+            name = f"PowerOn {self._format_datetime(start)}"
+        return self.add_alarm(name, start, delete_on_completion=True)
+
+    def _check_deleted(self, names: list[str]):
+        # wsman prints nothing when a delete succeeds, but also when it failed
+        # to reach the host at all, so check the alarms are really gone
+        remaining = [
+            alarm["InstanceID"]
+            for alarm in self.get_alarms()
+            if alarm["InstanceID"] in names
+        ]
+        if len(remaining) > 0:
+            raise ValueError(f"Could not delete alarm(s) {', '.join(remaining)}")
+
+    def _delete(self, name: str):
+        xmlns = f"{WSManClient.IPS}/IPS_AlarmClockOccurrence"
+        selector = f"InstanceID={quote(name)}"
+        raw_xml = self.client.retrieve("delete", f"{xmlns}?{selector}")
+        if raw_xml.strip() == "":
+            return
+        tree = self.client.parse(raw_xml)
+        self._check_fault(tree)
+
+    def delete_alarm(self, name: str):
+        self._delete(name)
+        self._check_deleted([name])
+
+    def delete_all_alarms(self) -> list[str]:
+        deleted: list[str] = []
+        for alarm in self.get_alarms():
+            self._delete(alarm["InstanceID"])
+            deleted.append(alarm["InstanceID"])
+        if len(deleted) > 0:
+            self._check_deleted(deleted)
+        return deleted
@@ -1,4 +1,6 @@
+from base64 import b64encode
 from itertools import chain
+import struct
 from typing import Any, Dict, cast
 from lxml import etree
 from .wsmanclient import WSManClient
@@ -76,6 +78,33 @@ class BootController:
         # 32768..65535 -> Vendor Specified
     }
 
+    BOOTSOURCES = {
+        # Boot capability -> CIM_BootSourceSetting InstanceID, see
+        #   https://software.intel.com/sites/manageability/AMT_Implementation_and_Reference_Guide/default.htm?turl=HTMLDocuments%2FWS-Management_Class_Reference%2FCIM_BootSourceSetting.htm
+        "ForcePXEBoot": "Intel(r) AMT: Force PXE Boot",
+        "ForceHardDriveBoot": "Intel(r) AMT: Force Hard-drive Boot",
+        "ForceCDorDVDBoot": "Intel(r) AMT: Force CD/DVD Boot",
+        "ForceUEFIHTTPSBoot": "Intel(r) AMT: Force OCR UEFI HTTPS Boot",
+        "ForceUEFILocalPBABoot": "Intel(r) AMT: Force OCR UEFI Boot Option",
+    }
+
+    UEFIBOOTPARAMETERS = {
+        # TLV types for AMT_BootSettingData.UEFIBootParametersArray, see
+        #   https://software.intel.com/sites/manageability/AMT_Implementation_and_Reference_Guide/default.htm?turl=WordDocuments%2Foneclickrecovery.htm
+        "EFINetworkDevicePath": 1,
+        "EFIFileDevicePath": 2,
+        "EFIDevicePathLength": 3,
+        "EFIBootOption": 4,
+        "HTTPSCertSyncRootCA": 5,
+        "HTTPSCertServerName": 6,
+        "HTTPSServerNameVerifyMethod": 7,
+        "HTTPSServerCertHashSHA256": 8,
+        "HTTPSServerCertHashSHA384": 9,
+        "HTTPSRequestTimeout": 10,
+        "HTTPSUserName": 11,
+        "HTTPSPassword": 12,
+    }
+
     BOOTCONFIGROLE = {
         # https://software.intel.com/sites/manageability/AMT_Implementation_and_Reference_Guide/default.htm?turl=WordDocuments%2Fsetordisablebootconfigurationsettingsforthenextboot.htm
         "1": "IsNextSingleUse",
@@ -88,7 +117,7 @@ class BootController:
     def get_boot_capabilities(self) -> list[str]:
         xmlns = f"{WSManClient.AMT}/AMT_BootCapabilities"
         raw_xml = self.client.retrieve("get", xmlns)
-        tree = etree.fromstring(bytes(raw_xml, encoding="utf-8"))
+        tree = self.client.parse(raw_xml)
         capabilities: list[str] = []
         for cap in self.BOOTCAPABILITIES:
             cap_element = tree.find(f".//{{{xmlns}}}{cap}")
@@ -103,7 +132,7 @@ class BootController:
         return capabilities
 
     def _parse_bootparams(self, xmlns: str, raw_xml: str) -> dict[str, str]:
-        tree = etree.fromstring(bytes(raw_xml, encoding="utf-8"))
+        tree = self.client.parse(raw_xml)
         fault = tree.find(f".//{{{WSManClient.SOAPENV}}}Fault")
         if fault is not None:
             text = tree.find(
@@ -159,7 +188,7 @@ class BootController:
         return self._parse_bootparams(xmlns, raw_xml)
 
     def _check_bootorder_result(self, xmlns: str, raw_xml: str) -> str:
-        tree = etree.fromstring(bytes(raw_xml, encoding="utf-8"))
+        tree = self.client.parse(raw_xml)
         returnvalue = tree.find(f".//{{{xmlns}}}ReturnValue")
         if (
             returnvalue is None
@@ -177,7 +206,64 @@ class BootController:
         )
         return self._check_bootorder_result(xmlns, raw_xml)
 
-    def set_bootorder_pxe(self) -> str:
+    def get_boot_sources(self) -> list[dict[str, str]]:
+        xmlns = f"{WSManClient.CIM}/CIM_BootSourceSetting"
+        raw_xml = self.client.retrieve("enumerate", xmlns, "-o", "-m", "32")
+        tree = self.client.parse(raw_xml)
+        sources: list[dict[str, str]] = []
+        for setting in tree.findall(f".//{{{xmlns}}}CIM_BootSourceSetting"):
+            source: dict[str, str] = {}
+            for field in [
+                "InstanceID",
+                "ElementName",
+                "StructuredBootString",
+                "BIOSBootString",
+                "BootString",
+                "FailThroughSupported",
+            ]:
+                element = setting.find(f"{{{xmlns}}}{field}")
+                if element is None or element.text is None:
+                    continue
+                source[field] = element.text
+            if "InstanceID" not in source:
+                raise ValueError("Missing InstanceID")
+            sources.append(source)
+        return sources
+
+    def _bootsource_to_instance_id(self, source: str) -> str:
+        if source in self.BOOTSOURCES.values():
+            return source
+        instance_id = self.BOOTSOURCES.get(source)
+        if instance_id is None:
+            raise ValueError(f"Invalid boot source {source} specified")
+        return instance_id
+
+    def _instance_id_to_capability(self, instance_id: str) -> str:
+        for key, val in self.BOOTSOURCES.items():
+            if val == instance_id:
+                return key
+        raise ValueError(f"Invalid boot source {instance_id} specified")
+
+    def uefi_boot_parameters(self, params: dict[str, str | int]) -> dict[str, str]:
+        # Each parameter is encoded as little endian TLV: uint16 type,
+        # uint32 length, value; the concatenation is passed as base64
+        encoded = b""
+        for key, val in params.items():
+            param_type = self.UEFIBOOTPARAMETERS.get(key)
+            if param_type is None:
+                raise ValueError(f"Invalid UEFI boot parameter {key} specified")
+            if isinstance(val, int):
+                value = struct.pack("<I", val)
+            else:
+                value = val.encode("utf-8")
+            encoded += struct.pack("<HI", param_type, len(value)) + value
+        return {
+            "UEFIBootParametersArray": b64encode(encoded).decode("ascii"),
+            "UEFIBootNumberOfParams": str(len(params)),
+        }
+
+    def set_bootorder(self, source: str) -> str:
+        instance_id = self._bootsource_to_instance_id(source)
         selector = "InstanceID=Intel(r)%20AMT:%20Boot%20Configuration%200"
         xmlns = f"{WSManClient.CIM}/CIM_BootConfigSetting"
         nsmap: Dict[str | None, str] = {
@@ -186,29 +272,28 @@ class BootController:
             "x": WSManClient.XSD,
         }
 
-        P = ElementMaker(namespace=xmlns, nsmap=nsmap)
-        REQUEST = P.ChangeBootOrder_INPUT
-        SOURCE = P.Source
-        A = ElementMaker(namespace=WSManClient.ADR, nsmap=nsmap)
-        ADDRESS = A.Address
-        REFERENCEPARAMETERS = A.ReferenceParameters
-        X = ElementMaker(namespace=WSManClient.XSD, nsmap=nsmap)
-        RESOURCEURI = X.ResourceURI
-        SELECTORSET = X.SelectorSet
-        SELECTOR = X.Selector
-
-        request: Any = REQUEST(
-            SOURCE(
-                ADDRESS(self.client.soap_address()),
-                REFERENCEPARAMETERS(
-                    RESOURCEURI(f"{WSManClient.CIM}/CIM_BootSourceSetting"),
-                    SELECTORSET(
-                        SELECTOR("Intel(r) AMT: Force PXE Boot", Name="InstanceID")
+        with self.client.phase("build"):
+            P = ElementMaker(namespace=xmlns, nsmap=nsmap)
+            REQUEST = P.ChangeBootOrder_INPUT
+            SOURCE = P.Source
+            A = ElementMaker(namespace=WSManClient.ADR, nsmap=nsmap)
+            ADDRESS = A.Address
+            REFERENCEPARAMETERS = A.ReferenceParameters
+            X = ElementMaker(namespace=WSManClient.XSD, nsmap=nsmap)
+            RESOURCEURI = X.ResourceURI
+            SELECTORSET = X.SelectorSet
+            SELECTOR = X.Selector
+
+            request: Any = REQUEST(
+                SOURCE(
+                    ADDRESS(self.client.soap_address()),
+                    REFERENCEPARAMETERS(
+                        RESOURCEURI(f"{WSManClient.CIM}/CIM_BootSourceSetting"),
+                        SELECTORSET(SELECTOR(instance_id, Name="InstanceID")),
                     ),
                 ),
-            ),
-        )
-        input_xml = etree.tostring(request, pretty_print=True).decode("utf-8")
+            )
+            input_xml = etree.tostring(request, pretty_print=True).decode("utf-8")
         raw_xml = self.client.send_input(
             input_xml,
             "invoke",
@@ -218,6 +303,9 @@ class BootController:
         )
         return self._check_bootorder_result(xmlns, raw_xml)
 
+    def set_bootorder_pxe(self) -> str:
+        return self.set_bootorder("ForcePXEBoot")
+
     def _bootconfig_to_internal_bootconfig(self, bootconfig: str) -> str:
         internal_bootconfig: str | None = None
         if bootconfig not in self.BOOTCONFIGROLE.keys():
@@ -241,33 +329,34 @@ class BootController:
             "x": WSManClient.XSD,
         }
 
-        P = ElementMaker(namespace=xmlns, nsmap=nsmap)
-        REQUEST = P.SetBootConfigRole_INPUT
-        BOOTCONFIGSETTING = P.BootConfigSetting
-        ROLE = P.Role
-        A = ElementMaker(namespace=WSManClient.ADR, nsmap=nsmap)
-        ADDRESS = A.Address
-        REFERENCEPARAMETERS = A.ReferenceParameters
-        X = ElementMaker(namespace=WSManClient.XSD, nsmap=nsmap)
-        RESOURCEURI = X.ResourceURI
-        SELECTORSET = X.SelectorSet
-        SELECTOR = X.Selector
-
-        request: Any = REQUEST(
-            BOOTCONFIGSETTING(
-                ADDRESS(self.client.soap_address()),
-                REFERENCEPARAMETERS(
-                    RESOURCEURI(f"{WSManClient.CIM}/CIM_BootConfigSetting"),
-                    SELECTORSET(
-                        SELECTOR(
-                            "Intel(r) AMT: Boot Configuration 0", Name="InstanceID"
-                        )
+        with self.client.phase("build"):
+            P = ElementMaker(namespace=xmlns, nsmap=nsmap)
+            REQUEST = P.SetBootConfigRole_INPUT
+            BOOTCONFIGSETTING = P.BootConfigSetting
+            ROLE = P.Role
+            A = ElementMaker(namespace=WSManClient.ADR, nsmap=nsmap)
+            ADDRESS = A.Address
+            REFERENCEPARAMETERS = A.ReferenceParameters
+            X = ElementMaker(namespace=WSManClient.XSD, nsmap=nsmap)
+            RESOURCEURI = X.ResourceURI
+            SELECTORSET = X.SelectorSet
+            SELECTOR = X.Selector
+
+            request: Any = REQUEST(
+                BOOTCONFIGSETTING(
+                    ADDRESS(self.client.soap_address()),
+                    REFERENCEPARAMETERS(
+                        RESOURCEURI(f"{WSManClient.CIM}/CIM_BootConfigSetting"),
+                        SELECTORSET(
+                            SELECTOR(
+                                "Intel(r) AMT: Boot Configuration 0", Name="InstanceID"
+                            )
+                        ),
                     ),
                 ),
-            ),
-            ROLE(internal_cfg),
-        )
-        input_xml = etree.tostring(request, pretty_print=True).decode("utf-8")
+                ROLE(internal_cfg),
+            )
+            input_xml = etree.tostring(request, pretty_print=True).decode("utf-8")
         raw_xml = self.client.send_input(
             input_xml,
             "invoke",
@@ -275,7 +364,7 @@ class BootController:
             "SetBootConfigRole",
             f"{xmlns}?{selector}",
         )
-        tree = etree.fromstring(bytes(raw_xml, encoding="utf-8"))
+        tree = self.client.parse(raw_xml)
         returnvalue = tree.find(f".//{{{xmlns}}}ReturnValue")
         if (
             returnvalue is None
@@ -284,3 +373,42 @@ class BootController:
         ):
             raise ValueError("Could not determine boot change result")
         return self.BOOTCHANGERESULTS[returnvalue.text]
+
+    def force_boot(self, source: str, uri: str | None = None):
+        # Perform the steps here in order, or AMT will not do the right thing:
+        # https://software.intel.com/sites/manageability/AMT_Implementation_and_Reference_Guide/default.htm?turl=WordDocuments%2Fsetsolstorageredirectionandotherbootoptions.htm
+        with self.client.sequence():
+            instance_id = self._bootsource_to_instance_id(source)
+            capability = self._instance_id_to_capability(instance_id)
+            capabilities = self.get_boot_capabilities()
+            if capability not in capabilities:
+                raise ValueError(f"Boot source {capability} not supported by this host")
+            if instance_id not in [
+                src["InstanceID"] for src in self.get_boot_sources()
+            ]:
+                raise ValueError(
+                    f"Boot source {instance_id} not available on this host"
+                )
+
+            params: dict[str, str] = {}
+            if capability == "ForceUEFIHTTPSBoot":
+                if uri is None:
+                    raise ValueError("UEFI HTTPS boot requires a URI")
+                params = self.uefi_boot_parameters({"EFINetworkDevicePath": uri})
+            elif uri is not None:
+                raise ValueError(f"Boot source {capability} does not accept a URI")
+            elif "ForceUEFIHTTPSBoot" in capabilities:
+                # Don't leave the URI (and any credentials in it) of an earlier
+                # HTTPS boot behind
+                params = {"UEFIBootParametersArray": "", "UEFIBootNumberOfParams": "0"}
+
+            self.set_bootparams(params)
+            result = self.clear_bootorder()
+            if result != self.BOOTCHANGERESULTS["0"]:
+                raise ValueError(f"Could not clear boot order: {result}")
+            result = self.set_bootorder(instance_id)
+            if result != self.BOOTCHANGERESULTS["0"]:
+                raise ValueError(f"Could not set boot order: {result}")
+            result = self.set_bootconfig("IsNextSingleUse")
+            if result != self.BOOTCHANGERESULTS["0"]:
+                raise ValueError(f"Could not set boot config role: {result}")
@@ -0,0 +1,176 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Any
+from .wsmanclient import WSManClient
+
+
+class Cassette:
+    VERSION = 1
+
+    # Property values never written to a cassette. The HTTPS boot credentials
+    # are passed inside the encoded UEFI boot parameters, so that whole value
+    # is withheld.
+    SECRET_PROPERTIES = [
+        "RFBPassword",
+        "HTTPSPassword",
+        "HTTPSUserName",
+        "UEFIBootParametersArray",
+    ]
+    REDACTED = "REDACTED"
+
+    def __init__(self, path: str, record: bool = False, append: bool = False):
+        # A cassette opened for recording starts out empty, unless append is
+        # set; recorded exchanges are kept in memory until save()
+        self.path = path
+        self.lock = threading.Lock()
+        self.interactions: list[dict[str, Any]] = []
+        if os.path.exists(path) and (not record or append):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != self.VERSION:
+                raise ValueError(f"Unsupported cassette version in {path}")
+            self.interactions = data["interactions"]
+
+    @staticmethod
+    def match_key(args: tuple[str, ...]) -> tuple[str, str, str]:
+        # Exchanges are matched on the wsman action (get, put, invoke, ...),
+        # the invoked method if any, and the resource URI including selectors
+        action = args[0] if len(args) > 0 else ""
+        method = ""
+        if "-a" in args and args.index("-a") + 1 < len(args):
+            method = args[args.index("-a") + 1]
+        resource = ""
+        for arg in args:
+            if "://" in arg:
+                resource = arg
+                break
+        return (action, method, resource)
+
+    @classmethod
+    def redact_args(cls, args: tuple[str, ...]) -> list[str]:
+        redacted: list[str] = []
+        for arg in args:
+            key, sep, _ = arg.partition("=")
+            if sep != "" and key in cls.SECRET_PROPERTIES:
+                arg = f"{key}={cls.REDACTED}"
+            redacted.append(arg)
+        return redacted
+
+    @classmethod
+    def redact_xml(cls, xml: str | None) -> str | None:
+        if xml is None:
+            return None
+        for prop in cls.SECRET_PROPERTIES:
+            xml = re.sub(
+                rf"(<(?:[\w.-]+:)?{prop}(?:\s[^>]*)?>)[^<]*(</(?:[\w.-]+:)?{prop}>)",
+                rf"\g<1>{cls.REDACTED}\g<2>",
+                xml,
+            )
+        return xml
+
+    def record(
+        self,
+        host: str,
+        args: tuple[str, ...],
+        input: str | None,
+        output: str,
+        duration: float,
+    ):
+        action, method, resource = self.match_key(args)
+        with self.lock:
+            self.interactions.append(
+                {
+                    "host": host,
+                    "action": action,
+                    "method": method,
+                    "resource": resource,
+                    "args": self.redact_args(args),
+                    "input": self.redact_xml(input),
+                    "output": self.redact_xml(output),
+                    "duration": duration,
+                }
+            )
+
+    def save(self):
+        # Write to a temporary file first, so a failing save keeps the
+        # previous cassette intact
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with self.lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": self.VERSION, "interactions": self.interactions},
+                    f,
+                    indent=2,
+                )
+        os.replace(tmp_path, self.path)
+
+
+class RecordingWSManClient(WSManClient):
+    def __init__(
+        self, host: str, port: int, user: str, password: str, cassette: Cassette
+    ):
+        super().__init__(host, port, user, password)
+        self.cassette = cassette
+
+    def _run(self, args: tuple[str, ...], input: str | None = None) -> str:
+        start = time.perf_counter()
+        output = super()._run(args, input)
+        self.cassette.record(
+            self.host, args, input, output, time.perf_counter() - start
+        )
+        return output
+
+
+class ReplayWSManClient(WSManClient):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        cassette: Cassette,
+        speed: float | None = None,
+    ):
+        # speed None replays instantly, otherwise recorded durations are
+        # simulated, scaled down by speed (1.0 is real time)
+        if speed is not None and speed <= 0:
+            raise ValueError("Replay speed must be positive")
+        super().__init__(host, port, user, password)
+        self.cassette = cassette
+        self.speed = speed
+        self.lock = threading.Lock()
+        # Prefer exchanges recorded for this host, but fall back to those of
+        # any host so a single host cassette can stand in for a whole fleet
+        self.responses: dict[tuple[str, str, str], list[dict[str, Any]]] = {}
+        fallback: dict[tuple[str, str, str], list[dict[str, Any]]] = {}
+        for interaction in cassette.interactions:
+            key = (
+                interaction["action"],
+                interaction["method"],
+                interaction["resource"],
+            )
+            if interaction["host"] == host:
+                self.responses.setdefault(key, []).append(interaction)
+            fallback.setdefault(key, []).append(interaction)
+        for key, interactions in fallback.items():
+            self.responses.setdefault(key, interactions)
+        self.positions: dict[tuple[str, str, str], int] = {}
+
+    def _run(self, args: tuple[str, ...], input: str | None = None) -> str:
+        key = Cassette.match_key(args)
+        recorded = self.responses.get(key)
+        if recorded is None:
+            raise KeyError(f"No recorded exchange for {' '.join(key)}")
+        # Exchanges for the same key are replayed in recorded order; once
+        # exhausted, the last one is repeated
+        with self.lock:
+            position = self.positions.get(key, 0)
+            self.positions[key] = position + 1
+        interaction = recorded[min(position, len(recorded) - 1)]
+        with self.phase("wait"):
+            if self.speed is not None:
+                time.sleep(interaction["duration"] / self.speed)
+        return interaction["output"]
@@ -0,0 +1,135 @@
+from contextlib import AbstractContextManager
+import fcntl
+import hashlib
+from os import environ
+import os
+import tempfile
+import threading
+from typing import Callable, TextIO
+from urllib.parse import quote
+from .wsmanclient import WSManClient
+
+
+class _Flight:
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.done = threading.Event()
+        self.result: str = ""
+        self.error: BaseException | None = None
+
+
+class _HostLock:
+    # Reentrant within a process, and exclusive across processes through an
+    # flock on a lock file per host, so separate automation jobs driving the
+    # same host serialize their write sequences too
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.file: TextIO | None = None
+
+    def __enter__(self) -> "_HostLock":
+        self.lock.acquire()
+        if self.depth == 0:
+            try:
+                self.file = open(self.path, "a")
+                fcntl.flock(self.file, fcntl.LOCK_EX)
+            except BaseException:
+                if self.file is not None:
+                    self.file.close()
+                    self.file = None
+                self.lock.release()
+                raise
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self.depth -= 1
+        if self.depth == 0 and self.file is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+        self.lock.release()
+
+
+class HostCoordinator:
+    READ_ACTIONS = ["get", "enumerate"]
+
+    _coordinators: dict[tuple[str, int], "HostCoordinator"] = {}
+    _coordinators_lock = threading.Lock()
+
+    @classmethod
+    def for_host(cls, host: str, port: int) -> "HostCoordinator":
+        with cls._coordinators_lock:
+            coordinator = cls._coordinators.get((host, port))
+            if coordinator is None:
+                coordinator = cls(cls.lock_path(host, port))
+                cls._coordinators[(host, port)] = coordinator
+            return coordinator
+
+    @staticmethod
+    def lock_path(host: str, port: int) -> str:
+        # AMT_LOCK_DIR overrides where the per host lock files are kept
+        lock_dir = environ.get(
+            "AMT_LOCK_DIR", os.path.join(tempfile.gettempdir(), "k3samt-locks")
+        )
+        os.makedirs(lock_dir, exist_ok=True)
+        return os.path.join(lock_dir, f"{quote(host, safe='')}_{port}.lock")
+
+    def __init__(self, lock_path: str):
+        self.lock = _HostLock(lock_path)
+        # Coalescing only merges reads within this process
+        self._flights: dict[tuple[str, ...], _Flight] = {}
+        self._flights_lock = threading.Lock()
+        # Incremented after every write, so reads issued after a write never
+        # share the result of a request that started before it
+        self.generation = 0
+
+    def wrote(self):
+        with self._flights_lock:
+            self.generation += 1
+
+    def read(self, key: tuple[str, ...], fetch: Callable[[], str]) -> str:
+        # Single-flight: the first caller for a key performs the request, any
+        # identical request arriving while it is in flight shares the result
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None or flight.generation < self.generation
+            if flight is None or leader:
+                flight = _Flight(self.generation)
+                self._flights[key] = flight
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                # A newer flight may have taken over the key after a write
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def request(
+        self, client: WSManClient, args: tuple[str, ...], input: str | None = None
+    ) -> str:
+        if input is None and len(args) > 0 and args[0] in self.READ_ACTIONS:
+            # Only requests made with the same credentials may share a response
+            identity = hashlib.sha256(
+                f"{client.user}\0{client.password}".encode("utf-8")
+            ).hexdigest()
+            return self.read((identity, *args), lambda: client._run(args))
+        with self.lock:
+            try:
+                return client._run(args, input)
+            finally:
+                self.wrote()
+
@@ -0,0 +1,136 @@
+import atexit
+import cProfile
+from os import environ
+import os
+import pstats
+import sys
+import threading
+from .wsmanclient import WSManClient
+from .cassette import Cassette, RecordingWSManClient, ReplayWSManClient
+from .coordinator import HostCoordinator
+from .profiler import Profiler
+
+_cassettes: dict[str, Cassette] = {}
+_profiler: Profiler | None = None
+# One cProfile profiler per thread, for the process that started them
+_cprofiles: list[cProfile.Profile] = []
+_cprofiles_lock = threading.Lock()
+_cprofile_pid: int | None = None
+
+
+def _write_profile(profiler: Profiler, path: str):
+    profiler.save(path)
+    print(profiler.report(), file=sys.stderr)
+
+
+class _ThreadProfile(cProfile.Profile):
+    # Take a snapshot without stopping the profiler, as its thread may still
+    # be running
+    def create_stats(self):
+        self.snapshot_stats()
+
+
+def _start_cprofile(*_):
+    # Also installed with threading.setprofile, so every thread started
+    # afterwards, such as the workers of a ThreadPoolExecutor, profiles itself
+    # from its first call on
+    profile = _ThreadProfile()
+    with _cprofiles_lock:
+        _cprofiles.append(profile)
+    profile.enable()
+
+
+def _enable_cprofile(path: str):
+    # Threads already running when profiling is enabled are not covered. A
+    # forked child discards the profiles inherited from its parent.
+    global _cprofile_pid
+    if _cprofile_pid is None:
+        atexit.register(dump_cprofile, path)
+    _cprofile_pid = os.getpid()
+    with _cprofiles_lock:
+        for profile in _cprofiles:
+            profile.disable()
+        _cprofiles.clear()
+    if sys.version_info < (3, 12):
+        threading.setprofile(_start_cprofile)
+    # From 3.12 on cProfile uses sys.monitoring, which covers all threads
+    # with a single profiler
+    _start_cprofile()
+
+
+def _profiler_from_environ() -> Profiler | None:
+    # AMT_PROFILE names a file receiving the per-phase timings of all clients
+    # at exit; AMT_PROFILE_CPROFILE additionally records a cProfile run of all
+    # threads
+    global _profiler
+    cprofile_path = environ.get("AMT_PROFILE_CPROFILE")
+    if cprofile_path is not None and _cprofile_pid != os.getpid():
+        _enable_cprofile(cprofile_path)
+
+    path = environ.get("AMT_PROFILE")
+    if path is None:
+        return None
+    if _profiler is None:
+        _profiler = Profiler()
+        atexit.register(_write_profile, _profiler, path)
+    return _profiler
+
+
+def environ_profiler() -> Profiler | None:
+    return _profiler_from_environ()
+
+
+def dump_cprofile(path: str):
+    # Combined stats of all threads recorded so far; also for processes that
+    # never run atexit handlers, such as pool workers
+    with _cprofiles_lock:
+        # pstats refuses profilers that haven't recorded anything yet
+        profiles = [profile for profile in _cprofiles if len(profile.getstats()) > 0]
+    if len(profiles) == 0:
+        return
+    pstats.Stats(*profiles).dump_stats(path)
+
+
+def create_client(host: str, port: int, user: str, password: str) -> WSManClient:
+    client = _client_from_environ(host, port, user, password)
+    client.profiler = _profiler_from_environ()
+    # Coalesce identical reads within this process, and serialize writes to
+    # the host across processes
+    client.coordinator = HostCoordinator.for_host(host, port)
+    return client
+
+
+def _client_from_environ(host: str, port: int, user: str, password: str) -> WSManClient:
+    # AMT_CASSETTE selects a cassette file to record to or replay from,
+    # depending on AMT_CASSETTE_MODE; without it wsman is called directly
+    path = environ.get("AMT_CASSETTE")
+    if path is None:
+        return WSManClient(host, port, user, password)
+
+    mode = environ.get("AMT_CASSETTE_MODE", "replay")
+    if mode not in ["record", "replay"]:
+        raise ValueError(f"Invalid cassette mode {mode} in environ AMT_CASSETTE_MODE")
+
+    # Clients for several hosts share the same cassette. A recording replaces
+    # an existing cassette unless AMT_CASSETTE_APPEND is set, and is written
+    # once at exit.
+    cassette = _cassettes.get(path)
+    if cassette is None:
+        if mode == "record":
+            cassette = Cassette(path, True, environ.get("AMT_CASSETTE_APPEND") == "1")
+            atexit.register(cassette.save)
+        else:
+            cassette = Cassette(path)
+        _cassettes[path] = cassette
+
+    if mode == "record":
+        return RecordingWSManClient(host, port, user, password, cassette)
+    speed = environ.get("AMT_CASSETTE_SPEED")
+    return ReplayWSManClient(
+        host,
+        port,
+        user,
+        password,
+        cassette,
+        None if speed is None else float(speed),
+    )
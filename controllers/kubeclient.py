@@ -0,0 +1,106 @@
+import json
+import ssl
+from typing import Any
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+
+class KubeClient:
+    # Minimal client for the few Kubernetes API calls needed to take a node in
+    # and out of service, see
+    #   https://kubernetes.io/docs/reference/kubernetes-api/
+    def __init__(
+        self,
+        api: str,
+        token: str | None = None,
+        ca_file: str | None = None,
+        timeout: float = 30,
+    ):
+        self.api = api.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+        self.context: ssl.SSLContext | None = None
+        if self.api.startswith("https://"):
+            self.context = ssl.create_default_context(cafile=ca_file)
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        body: dict[str, Any] | None = None,
+        content_type: str = "application/json",
+    ) -> dict[str, Any]:
+        headers = {"Accept": "application/json"}
+        if self.token is not None:
+            headers["Authorization"] = f"Bearer {self.token}"
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = content_type
+        request = Request(
+            f"{self.api}{path}", data=data, headers=headers, method=method
+        )
+        with urlopen(request, timeout=self.timeout, context=self.context) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def get_node(self, name: str) -> dict[str, Any]:
+        return self._request("GET", f"/api/v1/nodes/{quote(name)}")
+
+    def set_unschedulable(self, name: str, unschedulable: bool) -> dict[str, Any]:
+        return self._request(
+            "PATCH",
+            f"/api/v1/nodes/{quote(name)}",
+            {"spec": {"unschedulable": unschedulable}},
+            "application/merge-patch+json",
+        )
+
+    def get_pods_on_node(self, name: str) -> list[dict[str, Any]]:
+        selector = quote(f"spec.nodeName={name}")
+        return self._request("GET", f"/api/v1/pods?fieldSelector={selector}")["items"]
+
+    def evict_pod(self, namespace: str, name: str) -> bool:
+        # Returns False when the eviction is refused for now, typically because
+        # it would violate a PodDisruptionBudget
+        try:
+            self._request(
+                "POST",
+                f"/api/v1/namespaces/{quote(namespace)}/pods/{quote(name)}/eviction",
+                {
+                    "apiVersion": "policy/v1",
+                    "kind": "Eviction",
+                    "metadata": {"name": name, "namespace": namespace},
+                },
+            )
+        except HTTPError as e:
+            if e.code == 404:
+                # Already gone
+                return True
+            if e.code == 429:
+                return False
+            raise
+        return True
+
+    @staticmethod
+    def is_node_ready(node: dict[str, Any]) -> bool:
+        for condition in node.get("status", {}).get("conditions", []):
+            if condition.get("type") == "Ready":
+                return condition.get("status") == "True"
+        return False
+
+    @staticmethod
+    def boot_id(node: dict[str, Any]) -> str:
+        return node.get("status", {}).get("nodeInfo", {}).get("bootID", "")
+
+    @staticmethod
+    def is_evictable(pod: dict[str, Any]) -> bool:
+        # Same selection as kubectl drain --ignore-daemonsets: DaemonSet pods
+        # would be recreated on the node, mirror pods can't be evicted, and
+        # finished pods don't need to be
+        metadata = pod.get("metadata", {})
+        if "kubernetes.io/config.mirror" in metadata.get("annotations", {}):
+            return False
+        for owner in metadata.get("ownerReferences", []):
+            if owner.get("kind") == "DaemonSet":
+                return False
+        return pod.get("status", {}).get("phase") not in ["Succeeded", "Failed"]
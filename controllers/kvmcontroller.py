@@ -1,5 +1,4 @@
 from typing import Any, cast
-from lxml import etree
 from .wsmanclient import WSManClient
 
 # ElementMaker is not typed yet, workaround from
@@ -30,7 +29,7 @@ class KVMController:
 
         xmlns = f"{WSManClient.CIM}/CIM_KVMRedirectionSAP"
         raw_xml = self.client.retrieve("get", xmlns)
-        tree = etree.fromstring(bytes(raw_xml, encoding="utf-8"))
+        tree = self.client.parse(raw_xml)
         enabled_state = tree.find(f".//{{{xmlns}}}EnabledState")
         if enabled_state is None or enabled_state.text is None:
             raise ValueError("Could not retrieve KVM enabled state")
@@ -40,7 +39,7 @@ class KVMController:
        
         xmlns = f"{WSManClient.IPS}/IPS_KVMRedirectionSettingData"
         raw_xml = self.client.retrieve("get", xmlns)
-        tree = etree.fromstring(bytes(raw_xml, encoding="utf-8"))
+        tree = self.client.parse(raw_xml)
         enabled_mebx = tree.find(f".//{{{xmlns}}}EnabledByMEBx")
         if enabled_mebx is None or enabled_mebx.text is None:
             raise ValueError(
@@ -90,43 +89,45 @@ class KVMController:
     def enable_kvm_vnc(self, password: str):
         xmlns = f"{WSManClient.IPS}/IPS_KVMRedirectionSettingData"
 
-        state = self.get_kvm_state()
-        if state["EnabledByMEBx"] != "true":
-            raise ValueError("Cannot enable KVM as it is disabled by Intel ME")
+        with self.client.sequence():
+            state = self.get_kvm_state()
+            if state["EnabledByMEBx"] != "true":
+                raise ValueError("Cannot enable KVM as it is disabled by Intel ME")
 
-        # Always set the password as we cannot retrieve whether it is set or not
-        self.check_vnc_password(password)
-        raw_xml = self.client.retrieve("put", xmlns, "-k", f"RFBPassword={password}")
-        print(raw_xml)
-
-        # Enable VNC port 5900 if not yet enabled
-        if state["Is5900PortEnabled"] != "true":
-            raw_xml = self.client.retrieve("put", xmlns, "-k", "Is5900PortEnabled=true")
+            # Always set the password as we cannot retrieve whether it is set or not
+            self.check_vnc_password(password)
+            raw_xml = self.client.retrieve("put", xmlns, "-k", f"RFBPassword={password}")
             print(raw_xml)
+
+            # Enable VNC port 5900 if not yet enabled
+            if state["Is5900PortEnabled"] != "true":
+                raw_xml = self.client.retrieve("put", xmlns, "-k", "Is5900PortEnabled=true")
+                print(raw_xml)
         
-        # Disable opt-in policy if enabled
-        if state["OptInPolicy"] == "true":
-            raw_xml = self.client.retrieve("put", xmlns, "-k", "OptInPolicy=false")
-            print(raw_xml)
+            # Disable opt-in policy if enabled
+            if state["OptInPolicy"] == "true":
+                raw_xml = self.client.retrieve("put", xmlns, "-k", "OptInPolicy=false")
+                print(raw_xml)
 
-        # Enable KVM if not yet enabled
-        if state["EnabledState"] == "Disabled":
-            raw_xml = self.client.retrieve("invoke", "-a", "RequestStateChange",
-                f"{WSManClient.CIM}/CIM_KVMRedirectionSAP", "-k", "RequestedState=2")
-            print(raw_xml)
+            # Enable KVM if not yet enabled
+            if state["EnabledState"] == "Disabled":
+                raw_xml = self.client.retrieve("invoke", "-a", "RequestStateChange",
+                    f"{WSManClient.CIM}/CIM_KVMRedirectionSAP", "-k", "RequestedState=2")
+                print(raw_xml)
 
     def disable_kvm_vnc(self):
         xmlns = f"{WSManClient.IPS}/IPS_KVMRedirectionSettingData"
 
-        state = self.get_kvm_state()
+        with self.client.sequence():
+            state = self.get_kvm_state()
 
-        # Disable VNC port 5900 if enabled
-        if state["Is5900PortEnabled"] == "true":
-            raw_xml = self.client.retrieve("put", xmlns, "-k", "Is5900PortEnabled=false")
-            print(raw_xml)
+            # Disable VNC port 5900 if enabled
+            if state["Is5900PortEnabled"] == "true":
+                raw_xml = self.client.retrieve("put", xmlns, "-k", "Is5900PortEnabled=false")
+                print(raw_xml)
         
-        # Disable KVM if enabled
-        if state["EnabledState"] != "Disabled":
-            raw_xml = self.client.retrieve("invoke", "-a", "RequestStateChange",
-                f"{WSManClient.CIM}/CIM_KVMRedirectionSAP", "-k", "RequestedState=3")
-            print(raw_xml)
+            # Disable KVM if enabled
+            if state["EnabledState"] != "Disabled":
+                raw_xml = self.client.retrieve("invoke", "-a", "RequestStateChange",
+                    f"{WSManClient.CIM}/CIM_KVMRedirectionSAP", "-k", "RequestedState=3")
+                print(raw_xml)
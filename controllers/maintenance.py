@@ -0,0 +1,172 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from typing import Callable
+from .wsmanclient import WSManClient
+from .powercontroller import PowerController
+from .bootcontroller import BootController
+from .kubeclient import KubeClient
+
+
+class MaintenanceWorkflow:
+    ACTIONS = ["reboot", "reset", "pxe"]
+
+    OFFSTATES = ["Power Off - Soft", "Power Off - Hard", "Hibernate"]
+
+    def __init__(
+        self,
+        kube: KubeClient,
+        nodes: dict[str, WSManClient],
+        action: str = "reboot",
+        budget: int = 1,
+        drain_timeout: float = 600,
+        power_timeout: float = 300,
+        ready_timeout: float = 900,
+        poll_interval: float = 5,
+        preflight_workers: int = 16,
+    ):
+        if action not in self.ACTIONS:
+            raise ValueError(f"Invalid maintenance action {action} specified")
+        if budget < 1:
+            raise ValueError("Disruption budget must be at least 1")
+        if preflight_workers < 1:
+            raise ValueError("Need at least one preflight worker")
+        self.kube = kube
+        self.nodes = nodes
+        self.action = action
+        self.budget = budget
+        self.drain_timeout = drain_timeout
+        self.power_timeout = power_timeout
+        self.ready_timeout = ready_timeout
+        self.poll_interval = poll_interval
+        self.preflight_workers = preflight_workers
+        self.failed = threading.Event()
+
+    def _wait(self, timeout: float, what: str, done: Callable[[], bool]):
+        deadline = time.monotonic() + timeout
+        while not done():
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {what}")
+            time.sleep(self.poll_interval)
+
+    def preflight(self, name: str, client: WSManClient) -> tuple[str, bool]:
+        # Fail before taking anything down if either API is unreachable.
+        # Returns the boot ID, and whether the node was already cordoned, so
+        # that is restored afterwards.
+        node = self.kube.get_node(name)
+        if not KubeClient.is_node_ready(node):
+            raise ValueError(f"Node {name} is not ready")
+        state = PowerController(client).get_power_state()
+        if state["PowerState"] != "On":
+            raise ValueError(f"Node {name} is not powered on: {state['PowerState']}")
+        return (
+            KubeClient.boot_id(node),
+            node.get("spec", {}).get("unschedulable", False) is True,
+        )
+
+    def drain(self, name: str):
+        def drained() -> bool:
+            pods = [
+                pod
+                for pod in self.kube.get_pods_on_node(name)
+                if KubeClient.is_evictable(pod)
+            ]
+            # Evictions refused because of a disruption budget are retried
+            # on the next poll
+            for pod in pods:
+                self.kube.evict_pod(
+                    pod["metadata"]["namespace"], pod["metadata"]["name"]
+                )
+            return len(pods) == 0
+
+        self._wait(self.drain_timeout, f"node {name} to drain", drained)
+
+    def power_off(self, name: str, powerctl: PowerController):
+        state = powerctl.get_power_state()
+        if "Power Off - Soft Graceful" in state["AvailablePowerStates"]:
+            result = powerctl.set_power_state("Power Off - Soft Graceful")
+        elif "Power Off - Soft" in state["AvailablePowerStates"]:
+            result = powerctl.set_power_state("Power Off - Soft")
+        else:
+            raise ValueError(f"No soft power off available for node {name}")
+        if result != PowerController.POWERCHANGERESULTS["0"]:
+            raise ValueError(f"Could not power off node {name}: {result}")
+        self._wait(
+            self.power_timeout,
+            f"node {name} to power off",
+            lambda: powerctl.get_power_state()["PowerState"] in self.OFFSTATES,
+        )
+
+    def power_cycle(self, name: str, client: WSManClient):
+        powerctl = PowerController(client)
+        with client.sequence():
+            if self.action == "reset":
+                result = powerctl.set_power_state("Master Bus Reset")
+            else:
+                self.power_off(name, powerctl)
+                if self.action == "pxe":
+                    BootController(client).force_boot("ForcePXEBoot")
+                result = powerctl.set_power_state("On")
+        if result != PowerController.POWERCHANGERESULTS["0"]:
+            raise ValueError(f"Could not {self.action} node {name}: {result}")
+
+    def wait_ready(self, name: str, boot_id: str):
+        # A changed boot ID proves the node actually went through a boot,
+        # rather than still reporting Ready from before it went down. Without
+        # a boot ID, wait for the node to go NotReady and then Ready again.
+        went_down = False
+
+        def rebooted() -> bool:
+            nonlocal went_down
+            node = self.kube.get_node(name)
+            ready = KubeClient.is_node_ready(node)
+            if boot_id == "":
+                went_down = went_down or not ready
+                return went_down and ready
+            if KubeClient.boot_id(node) == boot_id:
+                return False
+            return ready
+
+        self._wait(self.ready_timeout, f"node {name} to become ready", rebooted)
+
+    def maintain(
+        self, name: str, client: WSManClient, boot_id: str, cordoned: bool
+    ) -> str:
+        # Once a node failed, don't take any further nodes out of service
+        if self.failed.is_set():
+            return "Skipped"
+        try:
+            self.kube.set_unschedulable(name, True)
+            self.drain(name)
+            self.power_cycle(name, client)
+            self.wait_ready(name, boot_id)
+            # A node cordoned by an operator before the run stays cordoned
+            self.kube.set_unschedulable(name, cordoned)
+        except Exception as e:
+            # The node is left cordoned for inspection
+            self.failed.set()
+            return f"Failed: {e}"
+        return "Completed"
+
+    def run(self) -> dict[str, str]:
+        # Preflight checks are cheap reads, so run many nodes at once
+        workers = min(len(self.nodes), self.preflight_workers) or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            preflights = dict(
+                zip(
+                    self.nodes.keys(),
+                    executor.map(
+                        self.preflight, self.nodes.keys(), self.nodes.values()
+                    ),
+                )
+            )
+
+        # Each worker takes a node through its entire cycle, and immediately
+        # starts on the next one when done, so at most budget nodes are out of
+        # service at any time without waiting for a whole batch to finish
+        with ThreadPoolExecutor(max_workers=self.budget) as executor:
+            futures = {
+                name: executor.submit(self.maintain, name, client, *preflights[name])
+                for name, client in self.nodes.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
@@ -70,7 +70,7 @@ class PowerController:
         raw_xml = self.client.retrieve(
             "get", xmlns, "-k", "PowerChangeCapabilities"
         )
-        tree = etree.fromstring(bytes(raw_xml, encoding="utf-8"))
+        tree = self.client.parse(raw_xml)
 
         capabilities: dict[str, list[str]] = {}
 
@@ -114,7 +114,7 @@ class PowerController:
     def get_power_state(self) -> dict[str, str | list[str]]:
         xmlns = f"{WSManClient.CIM}/CIM_AssociatedPowerManagementService"
         raw_xml = self.client.retrieve("get", xmlns)
-        tree = etree.fromstring(bytes(raw_xml, encoding="utf-8"))
+        tree = self.client.parse(raw_xml)
 
         powerstate: dict[str, str | list[str]] = {}
 
@@ -150,29 +150,30 @@ class PowerController:
             "x": WSManClient.XSD,
         }
 
-        P = ElementMaker(namespace=xmlns, nsmap=nsmap)
-        REQUEST = P.RequestPowerStateChange_INPUT
-        POWERSTATE = P.PowerState
-        MANAGEDELEMENT = P.ManagedElement
-        A = ElementMaker(namespace=WSManClient.ADR, nsmap=nsmap)
-        ADDRESS = A.Address
-        REFERENCEPARAMETERS = A.ReferenceParameters
-        X = ElementMaker(namespace=WSManClient.XSD, nsmap=nsmap)
-        RESOURCEURI = X.ResourceURI
-        SELECTORSET = X.SelectorSet
-        SELECTOR = X.Selector
-
-        request: Any = REQUEST(
-            POWERSTATE(internal_state),
-            MANAGEDELEMENT(
-                ADDRESS(self.client.soap_address()),
-                REFERENCEPARAMETERS(
-                    RESOURCEURI(f"{WSManClient.CIM}/CIM_ComputerSystem"),
-                    SELECTORSET(SELECTOR("ManagedSystem", Name="Name")),
+        with self.client.phase("build"):
+            P = ElementMaker(namespace=xmlns, nsmap=nsmap)
+            REQUEST = P.RequestPowerStateChange_INPUT
+            POWERSTATE = P.PowerState
+            MANAGEDELEMENT = P.ManagedElement
+            A = ElementMaker(namespace=WSManClient.ADR, nsmap=nsmap)
+            ADDRESS = A.Address
+            REFERENCEPARAMETERS = A.ReferenceParameters
+            X = ElementMaker(namespace=WSManClient.XSD, nsmap=nsmap)
+            RESOURCEURI = X.ResourceURI
+            SELECTORSET = X.SelectorSet
+            SELECTOR = X.Selector
+
+            request: Any = REQUEST(
+                POWERSTATE(internal_state),
+                MANAGEDELEMENT(
+                    ADDRESS(self.client.soap_address()),
+                    REFERENCEPARAMETERS(
+                        RESOURCEURI(f"{WSManClient.CIM}/CIM_ComputerSystem"),
+                        SELECTORSET(SELECTOR("ManagedSystem", Name="Name")),
+                    ),
                 ),
-            ),
-        )
-        input_xml = etree.tostring(request, pretty_print=True).decode("utf-8")
+            )
+            input_xml = etree.tostring(request, pretty_print=True).decode("utf-8")
         raw_xml = self.client.send_input(
             input_xml,
             "invoke",
@@ -180,7 +181,7 @@ class PowerController:
             "RequestPowerStateChange",
             f"{xmlns}?{selector}",
         )
-        tree = etree.fromstring(bytes(raw_xml, encoding="utf-8"))
+        tree = self.client.parse(raw_xml)
         returnvalue = tree.find(f".//{{{xmlns}}}ReturnValue")
         if (
             returnvalue is None
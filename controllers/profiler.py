@@ -0,0 +1,102 @@
+from contextlib import contextmanager
+import json
+import threading
+import time
+from typing import Iterator
+
+
+class Profiler:
+    # Phases of a single WS-Man exchange, in the order they happen. wsman is
+    # an external process, so connect, authentication and the server's
+    # processing time can only be measured together as "wait".
+    PHASES = ["build", "spawn", "wait", "parse"]
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # host -> phase -> [count, total seconds]
+        self.timings: dict[str, dict[str, list[float]]] = {}
+
+    @contextmanager
+    def phase(self, host: str, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(host, name, time.perf_counter() - start)
+
+    def add(self, host: str, name: str, duration: float, count: int = 1):
+        with self.lock:
+            timing = self.timings.setdefault(host, {}).setdefault(name, [0, 0.0])
+            timing[0] += count
+            timing[1] += duration
+
+    def merge(self, other: "Profiler"):
+        self.merge_timings(other.timings)
+
+    def merge_timings(self, timings: dict[str, dict[str, list[float]]]):
+        for host, phases in timings.items():
+            for name, (count, total) in phases.items():
+                self.add(host, name, total, int(count))
+
+    def take(self) -> dict[str, dict[str, list[float]]]:
+        # Hand over the timings so far, e.g. to a parent process, and start
+        # afresh
+        with self.lock:
+            timings = self.timings
+            self.timings = {}
+        return timings
+
+    def totals(self) -> dict[str, list[float]]:
+        # Aggregate over all hosts
+        totals: dict[str, list[float]] = {}
+        with self.lock:
+            for phases in self.timings.values():
+                for name, (count, total) in phases.items():
+                    timing = totals.setdefault(name, [0, 0.0])
+                    timing[0] += count
+                    timing[1] += total
+        return totals
+
+    def report(self) -> str:
+        totals = self.totals()
+        names = [name for name in self.PHASES if name in totals] + sorted(
+            name for name in totals if name not in self.PHASES
+        )
+        overall = sum(total for _, total in totals.values())
+        lines = [
+            f"{'phase':<10} {'count':>8} {'total (s)':>12} {'mean (ms)':>12} {'share':>7}"
+        ]
+        for name in names:
+            count, total = totals[name]
+            mean = total / count * 1000 if count else 0.0
+            share = total / overall * 100 if overall else 0.0
+            lines.append(
+                f"{name:<10} {int(count):>8} {total:>12.3f} {mean:>12.3f} {share:>6.1f}%"
+            )
+        lines.append(f"{len(self.timings)} host(s), {overall:.3f}s total")
+        return "\n".join(lines)
+
+    def collapsed(self) -> list[str]:
+        # Per-phase totals of each host in folded stack format (host;phase),
+        # weighted in microseconds, for flamegraph.pl and speedscope. These
+        # are not call stacks; use AMT_PROFILE_CPROFILE for those.
+        lines: list[str] = []
+        with self.lock:
+            for host, phases in sorted(self.timings.items()):
+                for name, (_, total) in sorted(phases.items()):
+                    lines.append(f"{host};{name} {int(total * 1_000_000)}")
+        return lines
+
+    def save(self, path: str):
+        with self.lock:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.timings, f, indent=2, sort_keys=True)
+
+    @classmethod
+    def load(cls, path: str) -> "Profiler":
+        profiler = cls()
+        with open(path, encoding="utf-8") as f:
+            for host, phases in json.load(f).items():
+                for name, (count, total) in phases.items():
+                    profiler.add(host, name, total, int(count))
+        return profiler
@@ -0,0 +1,135 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import multiprocessing
+from os import environ
+import os
+from typing import Any, Callable, Iterator
+from .wsmanclient import WSManClient
+from .factory import create_client, dump_cprofile, environ_profiler
+from .powercontroller import PowerController
+from .bootcontroller import BootController
+from .kvmcontroller import KVMController
+
+Task = Callable[[WSManClient], Any]
+
+
+def collect_info(client: WSManClient) -> dict[str, Any]:
+    # Same information as getinfo.py
+    powerctl = PowerController(client)
+    bootctl = BootController(client)
+    kvmctl = KVMController(client)
+    return {
+        "PowerChangeCapabilities": powerctl.get_power_change_capabilities(),
+        "PowerState": powerctl.get_power_state(),
+        "BootCapabilities": bootctl.get_boot_capabilities(),
+        "BootParams": bootctl.get_bootparams(),
+        "KVMState": kvmctl.get_kvm_state(),
+    }
+
+
+def collect_power_state(client: WSManClient) -> dict[str, Any]:
+    return PowerController(client).get_power_state()
+
+
+# State of each worker process, set up once by _init_worker
+_executor: ThreadPoolExecutor | None = None
+_settings: tuple[int, str, str, Task] | None = None
+
+
+def _init_worker(threads: int, port: int, user: str, password: str, task: Task):
+    global _executor, _settings
+    # Drop any timings inherited from the parent when forked. This also starts
+    # cProfile afresh for this process if requested, before the pool threads
+    # exist, so they are profiled too.
+    profiler = environ_profiler()
+    if profiler is not None:
+        profiler.take()
+    _executor = ThreadPoolExecutor(max_workers=threads)
+    _settings = (port, user, password, task)
+
+
+def _run_host(host: str) -> bytes:
+    if _settings is None:
+        raise ValueError("Worker process not initialized")
+    port, user, password, task = _settings
+    try:
+        record = {
+            "host": host,
+            "result": task(create_client(host, port, user, password)),
+        }
+    except Exception as e:
+        record = {"host": host, "error": str(e)}
+    return json.dumps(record, sort_keys=True).encode("utf-8")
+
+
+def _run_chunk(hosts: list[str]) -> tuple[bytes, dict[str, dict[str, list[float]]]]:
+    # Parsing and JSON encoding happen here, in the worker; the parent only
+    # receives one newline delimited blob per chunk, plus the chunk's profile
+    # timings as pool workers never run atexit handlers
+    if _executor is None:
+        raise ValueError("Worker process not initialized")
+    blob = b"".join(line + b"\n" for line in _executor.map(_run_host, hosts))
+    profiler = environ_profiler()
+    timings = {} if profiler is None else profiler.take()
+    cprofile_path = environ.get("AMT_PROFILE_CPROFILE")
+    if cprofile_path is not None:
+        # One stats file per worker, to be combined with pstats.Stats
+        dump_cprofile(f"{cprofile_path}.{os.getpid()}")
+    return blob, timings
+
+
+class ShardedRunner:
+    def __init__(
+        self,
+        hosts: list[str],
+        port: int,
+        user: str,
+        password: str,
+        task: Task = collect_info,
+        processes: int | None = None,
+        threads: int = 8,
+        chunk_size: int | None = None,
+    ):
+        # task must be a module level function, so it can be sent to workers
+        if environ.get("AMT_CASSETTE") is not None and (
+            environ.get("AMT_CASSETTE_MODE") == "record"
+        ):
+            # Workers would each write the same cassette, and never at exit
+            raise ValueError("Cannot record a cassette in a sharded run")
+        if threads < 1:
+            raise ValueError("Need at least one thread per process")
+        self.hosts = hosts
+        self.port = port
+        self.user = user
+        self.password = password
+        self.task = task
+        if processes is None:
+            processes = os.cpu_count() or 1
+        if processes < 1:
+            raise ValueError("Need at least one process")
+        self.processes = processes
+        self.threads = threads
+        # Small chunks stream results back early, large ones cost less IPC;
+        # by default each chunk keeps all of a worker's threads busy once
+        self.chunk_size = chunk_size or threads
+
+    def chunks(self) -> list[list[str]]:
+        return [
+            self.hosts[i : i + self.chunk_size]
+            for i in range(0, len(self.hosts), self.chunk_size)
+        ]
+
+    def run(self) -> Iterator[bytes]:
+        # Yields newline delimited JSON records, one per host, in order of
+        # completion. Profile timings from the workers are merged into this
+        # process' profiler, which is written at exit.
+        profiler = environ_profiler()
+        with multiprocessing.Pool(
+            self.processes,
+            _init_worker,
+            (self.threads, self.port, self.user, self.password, self.task),
+        ) as pool:
+            for blob, timings in pool.imap_unordered(_run_chunk, self.chunks()):
+                if profiler is not None:
+                    profiler.merge_timings(timings)
+                yield blob
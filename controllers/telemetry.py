@@ -0,0 +1,308 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import mmap
+import os
+import struct
+import threading
+import time
+from .wsmanclient import WSManClient
+from .powercontroller import PowerController
+from .kvmcontroller import KVMController
+
+
+class TelemetryStore:
+    # Fixed size ring of run-length encoded samples in a memory mapped file:
+    # consecutive samples with the same states only extend the current run, so
+    # the file never grows and a stable fleet hardly uses any of its capacity.
+    #
+    # Layout: header, host name table, then the ring of runs, each holding the
+    # host index, power and KVM state codes, and first and last sample time.
+    MAGIC = b"K3ST"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHIIII")
+    HEADER_SIZE = 64
+    HOSTNAME_SIZE = 64
+    RUN = struct.Struct("<HBBdd")
+
+    # Code 0 is used for samples where the state could not be retrieved
+    UNKNOWN = "Unknown"
+
+    def __init__(self, path: str, capacity: int = 65536, max_hosts: int = 1024):
+        # capacity and max_hosts only apply when creating a new store
+        self.lock = threading.Lock()
+        if not os.path.exists(path):
+            if capacity < 1 or max_hosts < 1 or max_hosts > 65535:
+                raise ValueError("Invalid telemetry store dimensions")
+            size = (
+                self.HEADER_SIZE
+                + max_hosts * self.HOSTNAME_SIZE
+                + capacity * self.RUN.size
+            )
+            with open(path, "wb") as f:
+                f.truncate(size)
+                f.write(
+                    self.HEADER.pack(
+                        self.MAGIC, self.VERSION, 0, capacity, max_hosts, 0, 0
+                    )
+                )
+
+        self.file = open(path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        magic, version, _, capacity, max_hosts, head, count = self.HEADER.unpack_from(
+            self.map, 0
+        )
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"{path} is not a telemetry store")
+        self.capacity = capacity
+        self.max_hosts = max_hosts
+        self.head = head
+        self.count = count
+        self.runs_offset = self.HEADER_SIZE + max_hosts * self.HOSTNAME_SIZE
+
+        self.power_codes = {
+            val: int(key) for key, val in PowerController.POWERSTATES.items()
+        }
+        self.kvm_codes = {val: int(key) for key, val in KVMController.KVMSTATES.items()}
+
+        self.hosts: dict[str, int] = {}
+        for index in range(max_hosts):
+            offset = self.HEADER_SIZE + index * self.HOSTNAME_SIZE
+            name = self.map[offset : offset + self.HOSTNAME_SIZE].rstrip(b"\0")
+            if name == b"":
+                break
+            self.hosts[name.decode("utf-8")] = index
+
+        # Slots of each host's runs, oldest first
+        self.slots: dict[int, deque[int]] = {
+            index: deque() for index in self.hosts.values()
+        }
+        for slot in self._ring_slots():
+            host_index = self.RUN.unpack_from(self.map, self._offset(slot))[0]
+            self.slots[host_index].append(slot)
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        self.file.close()
+
+    def flush(self):
+        self.map.flush()
+
+    def _offset(self, slot: int) -> int:
+        return self.runs_offset + slot * self.RUN.size
+
+    def _ring_slots(self) -> list[int]:
+        start = (self.head - self.count) % self.capacity
+        return [(start + i) % self.capacity for i in range(self.count)]
+
+    def _host_index(self, host: str) -> int:
+        index = self.hosts.get(host)
+        if index is not None:
+            return index
+        encoded = host.encode("utf-8")
+        if len(encoded) >= self.HOSTNAME_SIZE:
+            raise ValueError(f"Host name {host} too long")
+        if len(self.hosts) >= self.max_hosts:
+            raise ValueError("Telemetry store host table is full")
+        index = len(self.hosts)
+        offset = self.HEADER_SIZE + index * self.HOSTNAME_SIZE
+        self.map[offset : offset + len(encoded)] = encoded
+        self.hosts[host] = index
+        self.slots[index] = deque()
+        return index
+
+    def _decode(self, codes: dict[str, int], code: int) -> str:
+        for name, value in codes.items():
+            if value == code:
+                return name
+        return self.UNKNOWN
+
+    def _append(
+        self,
+        host_index: int,
+        power: int,
+        kvm: int,
+        first_seen: float,
+        last_seen: float,
+    ):
+        slot = self.head
+        if self.count == self.capacity:
+            # Overwriting the oldest run, which is the oldest of its host
+            old_host = self.RUN.unpack_from(self.map, self._offset(slot))[0]
+            self.slots[old_host].popleft()
+        else:
+            self.count += 1
+        self.RUN.pack_into(
+            self.map,
+            self._offset(slot),
+            host_index,
+            power,
+            kvm,
+            first_seen,
+            last_seen,
+        )
+        self.slots[host_index].append(slot)
+        self.head = (self.head + 1) % self.capacity
+        self.HEADER.pack_into(
+            self.map,
+            0,
+            self.MAGIC,
+            self.VERSION,
+            0,
+            self.capacity,
+            self.max_hosts,
+            self.head,
+            self.count,
+        )
+
+    def add(
+        self,
+        host: str,
+        timestamp: float,
+        power_state: str | None,
+        kvm_state: str | None,
+        max_gap: float | None = None,
+    ):
+        # Samples more than max_gap apart, e.g. because the recorder was not
+        # running, don't extend a run across the gap; the gap is recorded as
+        # unknown instead
+        power = 0 if power_state is None else self.power_codes.get(power_state, 0)
+        kvm = 0 if kvm_state is None else self.kvm_codes.get(kvm_state, 0)
+        with self.lock:
+            host_index = self._host_index(host)
+            slots = self.slots[host_index]
+            if len(slots) > 0:
+                offset = self._offset(slots[-1])
+                _, last_power, last_kvm, first_seen, last_seen = self.RUN.unpack_from(
+                    self.map, offset
+                )
+                unknown = last_power == 0 and last_kvm == 0
+                if max_gap is not None and timestamp - last_seen > max_gap:
+                    if not unknown:
+                        self._append(host_index, 0, 0, last_seen, timestamp)
+                        last_power, last_kvm = 0, 0
+                        offset = self._offset(slots[-1])
+                        first_seen = last_seen
+                if last_power == power and last_kvm == kvm:
+                    self.RUN.pack_into(
+                        self.map, offset, host_index, power, kvm, first_seen, timestamp
+                    )
+                    return
+            self._append(host_index, power, kvm, timestamp, timestamp)
+
+    def history(
+        self, host: str, since: float | None = None, until: float | None = None
+    ) -> list[tuple[float, float, str, str]]:
+        # Runs of (start, end, power state, KVM state), oldest first; a run
+        # lasts until the next one starts, the latest one until its last sample
+        with self.lock:
+            host_index = self.hosts.get(host)
+            if host_index is None:
+                return []
+            runs = [
+                self.RUN.unpack_from(self.map, self._offset(slot))
+                for slot in self.slots[host_index]
+            ]
+        history: list[tuple[float, float, str, str]] = []
+        for i, (_, power, kvm, first_seen, last_seen) in enumerate(runs):
+            end = runs[i + 1][3] if i + 1 < len(runs) else last_seen
+            if since is not None and end < since:
+                continue
+            if until is not None and first_seen > until:
+                break
+            history.append(
+                (
+                    first_seen,
+                    end,
+                    self._decode(self.power_codes, power),
+                    self._decode(self.kvm_codes, kvm),
+                )
+            )
+        return history
+
+    def uptime(
+        self, host: str, since: float | None = None, until: float | None = None
+    ) -> float:
+        uptime = 0.0
+        for start, end, power, _ in self.history(host, since, until):
+            if power != "On":
+                continue
+            if since is not None:
+                start = max(start, since)
+            if until is not None:
+                end = min(end, until)
+            uptime += max(0.0, end - start)
+        return uptime
+
+    def power_changes(
+        self, host: str, since: float | None = None
+    ) -> list[tuple[float, str]]:
+        # Moments the power state changed, with the new state
+        changes: list[tuple[float, str]] = []
+        previous: str | None = None
+        for start, _, power, _ in self.history(host):
+            if power == self.UNKNOWN:
+                continue
+            if previous is not None and power != previous:
+                if since is None or start >= since:
+                    changes.append((start, power))
+            previous = power
+        return changes
+
+    def is_flapping(self, host: str, window: float = 3600, threshold: int = 4) -> bool:
+        since = time.time() - window
+        return len(self.power_changes(host, since)) >= threshold
+
+
+class TelemetryRecorder:
+    def __init__(
+        self,
+        store: TelemetryStore,
+        clients: dict[str, WSManClient],
+        interval: float = 60,
+        workers: int = 16,
+        max_gap: float | None = None,
+    ):
+        # Hosts are sampled in parallel by a fixed number of workers, however
+        # large the fleet. A sample more than max_gap after the previous one,
+        # three intervals by default, starts a new run after an unknown gap.
+        if workers < 1:
+            raise ValueError("Need at least one worker")
+        self.store = store
+        self.clients = clients
+        self.interval = interval
+        self.max_gap = 3 * interval if max_gap is None else max_gap
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def close(self):
+        self.executor.shutdown()
+
+    def sample(self, host: str, client: WSManClient):
+        # A failing host is recorded as unknown rather than stopping the run
+        timestamp = time.time()
+        power_state: str | None = None
+        kvm_state: str | None = None
+        try:
+            state = PowerController(client).get_power_state()["PowerState"]
+            if isinstance(state, str):
+                power_state = state
+            kvm_state = KVMController(client).get_kvm_state()["EnabledState"]
+        except Exception:
+            pass
+        self.store.add(host, timestamp, power_state, kvm_state, self.max_gap)
+
+    def sample_all(self):
+        list(self.executor.map(self.sample, self.clients.keys(), self.clients.values()))
+        self.store.flush()
+
+    def run(self, iterations: int | None = None):
+        # Fixed rate schedule: a slow sweep does not shift later ones
+        next_sample = time.monotonic()
+        done = 0
+        while iterations is None or done < iterations:
+            self.sample_all()
+            done += 1
+            if iterations is not None and done >= iterations:
+                break
+            next_sample += self.interval
+            time.sleep(max(0.0, next_sample - time.monotonic()))
@@ -1,4 +1,11 @@
+from contextlib import AbstractContextManager, nullcontext
 import subprocess
+from typing import Any, TYPE_CHECKING
+from lxml import etree
+from .profiler import Profiler
+
+if TYPE_CHECKING:
+    from .coordinator import HostCoordinator
 
 
 class WSManClient:
@@ -15,50 +22,64 @@ class WSManClient:
         self.port = port
         self.user = user
         self.password = password
+        self.profiler: Profiler | None = None
+        self.coordinator: "HostCoordinator | None" = None
 
     def soap_address(self) -> str:
         return f"http://{self.host}:{self.port}/wsman"
 
+    def sequence(self) -> AbstractContextManager:
+        # Multi-step write sequences are wrapped in this context, so that
+        # coordinating clients can keep other writers to the same host out
+        if self.coordinator is None:
+            return nullcontext()
+        return self.coordinator.lock
+
+    def phase(self, name: str) -> AbstractContextManager:
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.phase(self.host, name)
+
+    def parse(self, raw_xml: str) -> Any:
+        with self.phase("parse"):
+            return etree.fromstring(bytes(raw_xml, encoding="utf-8"))
+
+    def _run(self, args: tuple[str, ...], input: str | None = None) -> str:
+        # Any input is passed to wsman on stdin
+        stdin_args = [] if input is None else ["-J", "-"]
+        with self.phase("spawn"):
+            process = subprocess.Popen(
+                [
+                    "wsman",
+                    "-h",
+                    self.host,
+                    "-P",
+                    str(self.port),
+                    "-u",
+                    self.user,
+                    "-p",
+                    self.password,
+                    *stdin_args,
+                    *args,
+                ],
+                stdin=None if input is None else subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+        with self.phase("wait"):
+            stdout, _ = process.communicate(input)
+        return stdout
+
     def retrieve(self, *args: str) -> str:
-        result = subprocess.run(
-            [
-                "wsman",
-                "-h",
-                self.host,
-                "-P",
-                str(self.port),
-                "-u",
-                self.user,
-                "-p",
-                self.password,
-                *args,
-            ],
-            capture_output=True,
-            text=True,
-        )
-        return result.stdout
+        if self.coordinator is not None:
+            return self.coordinator.request(self, args)
+        return self._run(args)
 
     def send_input(self, input: str, *args: str) -> str:
-        result = subprocess.run(
-            [
-                "wsman",
-                "-h",
-                self.host,
-                "-P",
-                str(self.port),
-                "-u",
-                self.user,
-                "-p",
-                self.password,
-                "-J",
-                "-",
-                *args,
-            ],
-            input=input,
-            capture_output=True,
-            text=True,
-        )
-        return result.stdout
+        if self.coordinator is not None:
+            return self.coordinator.request(self, args, input)
+        return self._run(args, input)
 
     def list_all(self):
         print(
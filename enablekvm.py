@@ -1,6 +1,6 @@
 from os import environ
 
-from controllers import WSManClient, KVMController
+from controllers import create_client, KVMController
 
 if __name__ == "__main__":
     host = environ.get("AMT_HOST")
@@ -11,7 +11,7 @@ if __name__ == "__main__":
     password = environ.get("AMT_PASSWORD")
     if password is None:
         raise ValueError("Need AMT password in environ AMT_PASSWORD")
-    client = WSManClient(host, port, user, password)
+    client = create_client(host, port, user, password)
     kvmctl = KVMController(client)
 
     vnc_password = environ.get("AMT_VNC_PASSWORD")
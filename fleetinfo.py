@@ -0,0 +1,35 @@
+from os import environ
+import sys
+
+from controllers import ShardedRunner
+from controllers.sharding import collect_info
+
+if __name__ == "__main__":
+    # Comma separated list of hosts to query
+    hosts = environ.get("AMT_HOSTS", environ.get("AMT_HOST"))
+    if hosts is None:
+        raise ValueError("Need AMT hosts in environ AMT_HOSTS or AMT_HOST")
+    port = 623
+    user = "admin"
+    password = environ.get("AMT_PASSWORD")
+    if password is None:
+        raise ValueError("Need AMT password in environ AMT_PASSWORD")
+    # Worker processes, defaults to one per core
+    processes = environ.get("AMT_PROCESSES")
+    # Concurrent hosts per worker process
+    threads = int(environ.get("AMT_THREADS", "8"))
+
+    hostlist = [host.strip() for host in hosts.split(",") if host.strip() != ""]
+    runner = ShardedRunner(
+        hostlist,
+        port,
+        user,
+        password,
+        collect_info,
+        None if processes is None else int(processes),
+        threads,
+    )
+    # One JSON record per line, written as the shards produce them
+    for blob in runner.run():
+        sys.stdout.buffer.write(blob)
+        sys.stdout.buffer.flush()
@@ -0,0 +1,32 @@
+from os import environ
+import time
+
+from controllers import create_client, PowerController, BootController
+
+if __name__ == "__main__":
+    host = environ.get("AMT_HOST")
+    if host is None:
+        raise ValueError("Need AMT host in environ AMT_HOST")
+    port = 623
+    user = "admin"
+    password = environ.get("AMT_PASSWORD")
+    if password is None:
+        raise ValueError("Need AMT password in environ AMT_PASSWORD")
+    client = create_client(host, port, user, password)
+    powerctl = PowerController(client)
+    bootctl = BootController(client)
+
+    # Full URI of the EFI boot image, e.g. https://boot.example/installer.efi
+    uri = environ.get("AMT_BOOT_URI")
+    if uri is None:
+        raise ValueError("Need boot URI in environ AMT_BOOT_URI")
+
+    print("==== Set UEFI HTTPS Boot for next boot")
+    # Keep other jobs from changing the boot source or power state of this
+    # host between setting the boot source and powering on
+    with client.sequence():
+        bootctl.force_boot("ForceUEFIHTTPSBoot", uri)
+        print("==== Turn on machine")
+        print(powerctl.set_power_state("On"))
+    time.sleep(1)
+    print(powerctl.get_power_state())
@@ -1,7 +1,7 @@
 import json
 from os import environ
 
-from controllers import WSManClient, PowerController, BootController, KVMController
+from controllers import create_client, PowerController, BootController, KVMController
 
 if __name__ == "__main__":
     host = environ.get("AMT_HOST")
@@ -12,7 +12,7 @@ if __name__ == "__main__":
     password = environ.get("AMT_PASSWORD")
     if password is None:
         raise ValueError("Need AMT password in environ AMT_PASSWORD")
-    client = WSManClient(host, port, user, password)
+    client = create_client(host, port, user, password)
     powerctl = PowerController(client)
     bootctl = BootController(client)
     kvmctl = KVMController(client)
@@ -0,0 +1,164 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+class KubeStandIn:
+    # In-memory stand-in for the Kubernetes API endpoints used by KubeClient,
+    # served on localhost, to exercise MaintenanceWorkflow without a cluster.
+    # Every change is logged in events as (time, kind, name).
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.nodes: dict[str, dict[str, Any]] = {}
+        self.pods: dict[str, list[dict[str, Any]]] = {}
+        # Pod name -> number of evictions still to refuse with 429
+        self.blocked: dict[str, int] = {}
+        self.events: list[tuple[float, str, str]] = []
+        self.server: ThreadingHTTPServer | None = None
+
+    def add_node(
+        self,
+        name: str,
+        boot_id: str = "boot-0",
+        ready: bool = True,
+        unschedulable: bool = False,
+    ):
+        self.nodes[name] = {
+            "metadata": {"name": name},
+            "spec": {"unschedulable": unschedulable},
+            "status": {
+                "nodeInfo": {"bootID": boot_id},
+                "conditions": [
+                    {"type": "Ready", "status": "True" if ready else "False"}
+                ],
+            },
+        }
+        self.pods[name] = []
+
+    def add_pod(
+        self,
+        node: str,
+        name: str,
+        namespace: str = "default",
+        daemonset: bool = False,
+        blocked: int = 0,
+    ):
+        owners = [{"kind": "DaemonSet"}] if daemonset else []
+        self.pods[node].append(
+            {
+                "metadata": {
+                    "name": name,
+                    "namespace": namespace,
+                    "ownerReferences": owners,
+                },
+                "spec": {"nodeName": node},
+                "status": {"phase": "Running"},
+            }
+        )
+        if blocked > 0:
+            self.blocked[name] = blocked
+
+    def _log(self, kind: str, name: str):
+        self.events.append((time.monotonic(), kind, name))
+
+    def _set_ready(self, node: str, ready: bool):
+        condition = self.nodes[node]["status"]["conditions"][0]
+        condition["status"] = "True" if ready else "False"
+
+    def reboot(self, node: str, delay: float = 0.1):
+        # The node drops out at once, and comes back Ready with a new boot ID
+        # (if it reports one) after delay
+        with self.lock:
+            self._set_ready(node, False)
+            self._log("down", node)
+
+        def up():
+            with self.lock:
+                node_info = self.nodes[node]["status"]["nodeInfo"]
+                if node_info["bootID"] != "":
+                    node_info["bootID"] = f"{node_info['bootID']}+"
+                self._set_ready(node, True)
+                self._log("up", node)
+
+        threading.Timer(delay, up).start()
+
+    def handle(
+        self, method: str, path: str, body: dict[str, Any] | None
+    ) -> tuple[int, dict[str, Any]]:
+        url = urlparse(path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        with self.lock:
+            if parts[:3] == ["api", "v1", "nodes"] and len(parts) == 4:
+                node = self.nodes.get(parts[3])
+                if node is None:
+                    return 404, {"kind": "Status", "code": 404}
+                if method == "PATCH" and body is not None:
+                    unschedulable = body["spec"]["unschedulable"]
+                    node["spec"]["unschedulable"] = unschedulable
+                    self._log("cordon" if unschedulable else "uncordon", parts[3])
+                return 200, node
+            if parts == ["api", "v1", "pods"] and method == "GET":
+                selector = parse_qs(url.query).get("fieldSelector", [""])[0]
+                node_name = selector.partition("spec.nodeName=")[2]
+                return 200, {"items": self.pods.get(node_name, [])}
+            if len(parts) == 7 and parts[-1] == "eviction" and method == "POST":
+                pod_name = parts[5]
+                if self.blocked.get(pod_name, 0) > 0:
+                    self.blocked[pod_name] -= 1
+                    self._log("refused", pod_name)
+                    return 429, {"kind": "Status", "code": 429}
+                for pods in self.pods.values():
+                    for pod in pods:
+                        if pod["metadata"]["name"] == pod_name:
+                            pods.remove(pod)
+                            self._log("evicted", pod_name)
+                            return 201, {"kind": "Status", "code": 201}
+                return 404, {"kind": "Status", "code": 404}
+        return 404, {"kind": "Status", "code": 404}
+
+    def start(self) -> str:
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: Any):
+                pass
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length", "0"))
+                body = json.loads(self.rfile.read(length)) if length > 0 else None
+                code, response = standin.handle(self.command, self.path, body)
+                data = json.dumps(response).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = _serve
+            do_PATCH = _serve
+            do_POST = _serve
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def max_concurrent(self, start: str, end: str) -> int:
+        # Largest number of nodes between a start and end event at once
+        current: set[str] = set()
+        peak = 0
+        for _, kind, name in self.events:
+            if kind == start:
+                current.add(name)
+            elif kind == end:
+                current.discard(name)
+            peak = max(peak, len(current))
+        return peak
@@ -0,0 +1,18 @@
+import json
+from os import environ
+
+from controllers import create_client, AlarmClockController
+
+if __name__ == "__main__":
+    host = environ.get("AMT_HOST")
+    if host is None:
+        raise ValueError("Need AMT host in environ AMT_HOST")
+    port = 623
+    user = "admin"
+    password = environ.get("AMT_PASSWORD")
+    if password is None:
+        raise ValueError("Need AMT password in environ AMT_PASSWORD")
+    client = create_client(host, port, user, password)
+    alarmctl = AlarmClockController(client)
+
+    print(json.dumps(alarmctl.get_alarms(), sort_keys=True, indent=4))
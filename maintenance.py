@@ -0,0 +1,44 @@
+import json
+from os import environ
+import sys
+
+from controllers import create_client, KubeClient, MaintenanceWorkflow
+
+if __name__ == "__main__":
+    # Comma separated list of node=amthost pairs, maintained in the order given
+    nodes = environ.get("K3S_NODES")
+    if nodes is None:
+        raise ValueError("Need node=host pairs in environ K3S_NODES")
+    port = 623
+    user = "admin"
+    password = environ.get("AMT_PASSWORD")
+    if password is None:
+        raise ValueError("Need AMT password in environ AMT_PASSWORD")
+
+    api = environ.get("K8S_API", "https://kubernetes.default.svc")
+    token = environ.get("K8S_TOKEN")
+    token_file = environ.get("K8S_TOKEN_FILE")
+    if token is None and token_file is not None:
+        with open(token_file, encoding="utf-8") as f:
+            token = f.read().strip()
+    kube = KubeClient(api, token, environ.get("K8S_CA"))
+
+    # One of reboot, reset or pxe
+    action = environ.get("K3S_MAINTENANCE_ACTION", "reboot")
+    # Number of nodes that may be out of service at the same time
+    budget = int(environ.get("K3S_DISRUPTION_BUDGET", "1"))
+
+    clients = {}
+    for pair in nodes.split(","):
+        if pair.strip() == "":
+            continue
+        node, _, host = pair.strip().partition("=")
+        if host == "":
+            raise ValueError(f"Invalid node=host pair {pair} in environ K3S_NODES")
+        clients[node] = create_client(host, port, user, password)
+
+    workflow = MaintenanceWorkflow(kube, clients, action, budget)
+    results = workflow.run()
+    print(json.dumps(results, sort_keys=True, indent=4))
+    if any(result != "Completed" for result in results.values()):
+        sys.exit(1)
@@ -0,0 +1,21 @@
+from os import environ
+
+from controllers import Profiler
+
+if __name__ == "__main__":
+    # Comma separated list of files written by runs with AMT_PROFILE set,
+    # e.g. one per host or per fleet shard
+    paths = environ.get("AMT_PROFILES")
+    if paths is None:
+        raise ValueError("Need profile files in environ AMT_PROFILES")
+
+    profiler = Profiler()
+    for path in paths.split(","):
+        profiler.merge(Profiler.load(path.strip()))
+    print(profiler.report())
+
+    # Optionally write per-phase folded totals for flamegraph.pl or speedscope
+    folded = environ.get("AMT_PROFILE_FOLDED")
+    if folded is not None:
+        with open(folded, "w", encoding="utf-8") as f:
+            f.write("\n".join(profiler.collapsed()) + "\n")
@@ -0,0 +1,35 @@
+from os import environ
+
+from controllers import create_client, TelemetryRecorder, TelemetryStore
+
+if __name__ == "__main__":
+    # Comma separated list of hosts to sample
+    hosts = environ.get("AMT_HOSTS", environ.get("AMT_HOST"))
+    if hosts is None:
+        raise ValueError("Need AMT hosts in environ AMT_HOSTS or AMT_HOST")
+    port = 623
+    user = "admin"
+    password = environ.get("AMT_PASSWORD")
+    if password is None:
+        raise ValueError("Need AMT password in environ AMT_PASSWORD")
+
+    path = environ.get("AMT_TELEMETRY")
+    if path is None:
+        raise ValueError("Need telemetry store file in environ AMT_TELEMETRY")
+    # Seconds between samples
+    interval = float(environ.get("AMT_TELEMETRY_INTERVAL", "60"))
+    # Number of hosts sampled at the same time
+    workers = int(environ.get("AMT_TELEMETRY_WORKERS", "16"))
+
+    clients = {
+        host.strip(): create_client(host.strip(), port, user, password)
+        for host in hosts.split(",")
+        if host.strip() != ""
+    }
+    store = TelemetryStore(path)
+    recorder = TelemetryRecorder(store, clients, interval, workers)
+    try:
+        recorder.run()
+    finally:
+        recorder.close()
+        store.close()
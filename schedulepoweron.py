@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+from os import environ
+import sys
+
+from controllers import create_client, AlarmClockController
+
+if __name__ == "__main__":
+    # Comma separated list of hosts, powered on in the order given
+    hosts = environ.get("AMT_HOSTS", environ.get("AMT_HOST"))
+    if hosts is None:
+        raise ValueError("Need AMT hosts in environ AMT_HOSTS or AMT_HOST")
+    port = 623
+    user = "admin"
+    password = environ.get("AMT_PASSWORD")
+    if password is None:
+        raise ValueError("Need AMT password in environ AMT_PASSWORD")
+
+    # ISO 8601 timestamp including timezone, e.g. 2022-03-01T06:00:00+01:00
+    poweron_at = environ.get("AMT_POWERON_AT")
+    if poweron_at is None:
+        raise ValueError("Need power on time in environ AMT_POWERON_AT")
+    start = datetime.fromisoformat(poweron_at)
+    if start.tzinfo is None:
+        start = start.astimezone()
+    # Seconds between subsequent hosts, to spread the load of a cold start
+    spread = timedelta(seconds=int(environ.get("AMT_POWERON_SPREAD", "60")))
+
+    hostlist = [host.strip() for host in hosts.split(",") if host.strip() != ""]
+    times = AlarmClockController.staggered_start_times(start, len(hostlist), spread)
+    # A failing host doesn't stop the others from being scheduled
+    failed: list[str] = []
+    for host, when in zip(hostlist, times):
+        print(f"==== {host}: power on at {when.isoformat()}")
+        try:
+            client = create_client(host, port, user, password)
+            result = AlarmClockController(client).schedule_power_on(when)
+        except Exception as e:
+            result = f"Error: {e}"
+        print(result)
+        if result != AlarmClockController.ADDALARMRESULTS["0"]:
+            failed.append(host)
+
+    if len(failed) > 0:
+        print(f"=== FAIL: could not schedule power on for {', '.join(failed)}")
+        sys.exit(1)
@@ -0,0 +1,24 @@
+import json
+from os import environ
+import time
+
+from controllers import TelemetryStore
+
+if __name__ == "__main__":
+    path = environ.get("AMT_TELEMETRY")
+    if path is None:
+        raise ValueError("Need telemetry store file in environ AMT_TELEMETRY")
+    # Seconds to report on, counting back from now
+    window = float(environ.get("AMT_TELEMETRY_WINDOW", "86400"))
+    since = time.time() - window
+
+    store = TelemetryStore(path)
+    report = {}
+    for host in store.hosts:
+        report[host] = {
+            "Uptime": store.uptime(host, since),
+            "PowerChanges": len(store.power_changes(host, since)),
+            "Flapping": store.is_flapping(host),
+        }
+    store.close()
+    print(json.dumps(report, sort_keys=True, indent=4))
@@ -1,7 +1,7 @@
 from os import environ
 import sys
 
-from controllers import WSManClient, PowerController
+from controllers import create_client, PowerController
 
 if __name__ == "__main__":
     host = environ.get("AMT_HOST")
@@ -12,7 +12,7 @@ if __name__ == "__main__":
     password = environ.get("AMT_PASSWORD")
     if password is None:
         raise ValueError("Need AMT password in environ AMT_PASSWORD")
-    client = WSManClient(host, port, user, password)
+    client = create_client(host, port, user, password)
     powerctl = PowerController(client)
 
     current_state = powerctl.get_power_state()